@@ -9,31 +9,75 @@ Add or edit companies in shared/companies.json. Then run this script to refresh
 Note: The generic pages in dist/portal.html and dist/login.html already support ?company=<id>
       and do not require regeneration for new companies.
 """
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 import json
+import os
+import re
 import shutil
 
 ROOT = Path(__file__).resolve().parent
 SHARED = ROOT / "shared"
 DIST = ROOT / "dist"
+TEMPLATES = DIST / "_templates"
 YEAR = "2026"
+SHARED_PREFIX = "../../shared/"
 
-PORTAL_TPL = (DIST / "_templates" / "portal.tpl.html").read_text(encoding="utf-8")
-LOGIN_TPL  = (DIST / "_templates" / "login.tpl.html").read_text(encoding="utf-8")
+# Placeholders that are the same for every company, replaced in a single pass
+TOKENS = re.compile(r"__SHARED__|__YEAR__")
 
-def fill(t, company_id, shared_prefix):
-    return (t.replace("__COMPANY__", company_id)
-             .replace("__SHARED__", shared_prefix)
-             .replace("__YEAR__", YEAR))
+# path -> ((st_mtime_ns, st_size), parsed value)
+_cache = {}
+
+def load(path, parser=lambda b: b.decode("utf-8")):
+    """Read and parse a file, reusing the previous result while it is unchanged on disk."""
+    st = os.stat(path)
+    sig = (st.st_mtime_ns, st.st_size)
+    hit = _cache.get(path)
+    if hit and hit[0] == sig:
+        return hit[1]
+    value = parser(Path(path).read_bytes())
+    _cache[path] = (sig, value)
+    return value
+
+def fill(t, mapping):
+    return TOKENS.sub(lambda m: mapping[m.group(0)], t)
+
+def prefill(raw):
+    """Resolve the company-independent placeholders once and encode the result."""
+    return fill(raw.decode("utf-8"), {"__SHARED__": SHARED_PREFIX, "__YEAR__": YEAR}).encode("utf-8")
+
+# O_BINARY only exists (and matters) on Windows, where it disables newline translation
+WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+def write_file(path, data):
+    """Write bytes straight to a file descriptor, skipping the buffered I/O layer."""
+    fd = os.open(path, WRITE_FLAGS, 0o666)  # umask decides, as with write_text
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+# dist/write are bound as defaults so the per-company calls read locals, not globals
+def emit(c, portal_tpl, login_tpl, dist=DIST, write=write_file):
+    cid = c["id"]
+    cdir = dist / cid
+    cdir.mkdir(parents=True, exist_ok=True)
+    company = cid.encode("utf-8")
+    write(cdir / "portal.html", portal_tpl.replace(b"__COMPANY__", company))
+    write(cdir / "login.html", login_tpl.replace(b"__COMPANY__", company))
 
 def main():
-    companies = json.loads((SHARED / "companies.json").read_text(encoding="utf-8"))
-    # Recreate per-company folders
-    for c in companies:
-        cdir = DIST / c["id"]
-        cdir.mkdir(parents=True, exist_ok=True)
-        (cdir / "portal.html").write_text(fill(PORTAL_TPL, c["id"], "../../shared/"), encoding="utf-8")
-        (cdir / "login.html").write_text(fill(LOGIN_TPL, c["id"], "../../shared/"), encoding="utf-8")
+    companies = load(SHARED / "companies.json", json.loads)
+    portal_tpl = load(TEMPLATES / "portal.tpl.html", prefill)
+    login_tpl = load(TEMPLATES / "login.tpl.html", prefill)
+    # Recreate per-company folders; each company is independent file I/O
+    if companies:
+        with ThreadPoolExecutor(max_workers=min(32, len(companies))) as ex:
+            list(ex.map(partial(emit, portal_tpl=portal_tpl, login_tpl=login_tpl), companies))
     print("Generated per-company pages in dist/<company>/")
 
 if __name__ == "__main__":
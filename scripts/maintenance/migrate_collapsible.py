@@ -4,84 +4,250 @@ Migrate old CollapsibleHeaderButton pattern to new CollapsibleHeader service.
 This script automates the Phase 3 migration for large flow files.
 """
 
+import functools
+import multiprocessing
+import os
 import re
 import sys
 from pathlib import Path
 
-def add_imports(content):
-    """Add CollapsibleHeader import and required icons."""
-    # Check if CollapsibleHeader is already imported
-    if 'CollapsibleHeader' in content:
+SECTION_OPEN = '<CollapsibleSection>'
+SECTION_CLOSE = '</CollapsibleSection>'
+HEADER_OPEN = '<CollapsibleHeaderButton'
+HEADER_CLOSE = '</CollapsibleHeaderButton>'
+CONTENT_OPEN = '<CollapsibleContent>'
+CONTENT_CLOSE = '</CollapsibleContent>'
+
+COLLAPSIBLE_HEADER_SOURCE = "from '../../services/collapsibleHeaderService';"
+COLLAPSIBLE_HEADER_IMPORT = "import { CollapsibleHeader } " + COLLAPSIBLE_HEADER_SOURCE
+SERVICES_SOURCE_PREFIX = "from '../../services/"
+ICONS_SOURCE = "from 'react-icons/fi';"
+
+# Section styles in priority order: the first entry with a keyword anywhere in the
+# (lowercased) title supplies the icon and theme
+SECTION_STYLES = [
+    (('overview', 'what is', 'how', 'education', 'learn', 'understand'), '<FiBook />', 'theme="yellow"'),
+    (('configuration', 'credentials', 'settings', 'parameters', 'advanced', 'pkce'), '<FiSettings />', 'theme="orange"'),
+    (('request', 'authorization', 'generate', 'create'), '<FiSend />', 'theme="blue"'),
+    (('response', 'received', 'token', 'code', 'result'), '<FiPackage />', ''),  # default theme
+    (('complete', 'success', 'done', 'next steps'), '<FiCheckCircle />', 'theme="green"'),
+    (('deep dive', 'details'), '<FiBook />', 'theme="green"'),
+]
+DEFAULT_SECTION_STYLE = ('<FiSettings />', '')
+KEYWORD_RANK = {word: rank for rank, (words, _, _) in enumerate(SECTION_STYLES) for word in words}
+# One scan finds every keyword; the lookahead also reports overlapping ones
+KEYWORD_PATTERN = re.compile('(?=(%s))' % '|'.join(re.escape(word) for word in KEYWORD_RANK))
+
+def find_import(content, source):
+    """Return the (start, end) span of the first plain `import { ... }` statement ending in source.
+
+    Type-only, namespace and default imports of the same source are skipped; None if there is none.
+    """
+    pos = 0
+    while True:
+        source_start = content.find(source, pos)
+        if source_start == -1:
+            return None
+        pos = source_start + len(source)
+        start = content.rfind('import', 0, source_start)
+        if start == -1:
+            continue
+        clause = content[start + len('import'):source_start].strip()
+        if clause.startswith('{') and clause.endswith('}') and clause.count('{') == 1:
+            return start, pos
+
+def imported_names(statement):
+    """Return the local names bound by the braces of a named import statement."""
+    names = statement[statement.find('{') + 1:statement.rfind('}')].split(',')
+    return {name.split(' as ')[-1].strip() for name in names} - {''}
+
+def add_named_imports(content, span, names):
+    """Add names to the braces of the import statement at span, keeping one trailing comma."""
+    start, end = span
+    statement = content[start:end]
+    close = statement.rfind('}')
+    head = statement[:close].rstrip().rstrip(',')
+    added = ''.join(f',\n\t{name}' for name in names)
+    return content[:start] + f'{head}{added},\n' + statement[close:] + content[end:]
+
+def insert_before_imports(content, statement):
+    """Insert a statement on its own line above the first import of the file."""
+    first = 0 if content.startswith('import ') else content.find('\nimport ') + 1
+    return content[:first] + statement + '\n' + content[first:]
+
+def add_imports(content, icons):
+    """Add the CollapsibleHeader import and the given react-icons/fi icons where missing."""
+    span = find_import(content, COLLAPSIBLE_HEADER_SOURCE)
+    if span and 'CollapsibleHeader' in imported_names(content[span[0]:span[1]]):
         print("  ✓ CollapsibleHeader already imported")
-        return content
-    
-    # Add CollapsibleHeader import after other service imports
-    pattern = r"(import.*from '\.\.\/\.\.\/services\/[^']+';)"
-    
-    def add_import(match):
-        return match.group(0) + "\nimport { CollapsibleHeader } from '../../services/collapsibleHeaderService';"
-    
-    content = re.sub(pattern, add_import, content, count=1)
-    
-    # Add required icons if not present
-    icons_to_add = ['FiBook', 'FiPackage', 'FiSend', 'FiSettings']
-    
-    # Find the react-icons import
-    icon_pattern = r"(import \{[^}]+\} from 'react-icons/fi';)"
-    match = re.search(icon_pattern, content)
+    elif span:
+        # The service is imported for something else (or under an alias)
+        content = add_named_imports(content, span, ['CollapsibleHeader'])
+        print("  ✓ Added CollapsibleHeader to existing import")
+    else:
+        # Add CollapsibleHeader import after the first service import
+        service_start = content.find(SERVICES_SOURCE_PREFIX)
+        service_end = content.find("';", service_start) if service_start != -1 else -1
+        if service_end != -1:
+            service_end += len("';")
+            content = content[:service_end] + '\n' + COLLAPSIBLE_HEADER_IMPORT + content[service_end:]
+        else:
+            content = insert_before_imports(content, COLLAPSIBLE_HEADER_IMPORT)
+        print("  ✓ Added CollapsibleHeader import")
     
-    if match:
-        existing_icons = match.group(1)
-        icons_needed = [icon for icon in icons_to_add if icon not in existing_icons]
-        
-        if icons_needed:
-            # Add missing icons
-            new_import = existing_icons.replace('} from', f",\n\t{', '.join(icons_needed)},\n}} from")
-            content = content.replace(existing_icons, new_import)
-            print(f"  ✓ Added icons: {', '.join(icons_needed)}")
+    # Add the icons used by the converted sections if not present
+    span = find_import(content, ICONS_SOURCE)
+    existing_icons = imported_names(content[span[0]:span[1]]) if span else set()
+    icons_needed = [icon for icon in sorted(icons) if icon not in existing_icons]
+    if icons_needed:
+        if span:
+            content = add_named_imports(content, span, icons_needed)
+        else:
+            content = insert_before_imports(content, f"import {{ {', '.join(icons_needed)} }} {ICONS_SOURCE}")
+        print(f"  ✓ Added icons: {', '.join(icons_needed)}")
     
     return content
 
-def convert_section(match):
-    """Convert a single CollapsibleHeaderButton section to CollapsibleHeader."""
-    full_match = match.group(0)
+def extract_between(text, open_tag, close_tag):
+    """Return the text between the first open_tag and the close_tag after it, or None."""
+    start = text.find(open_tag)
+    if start == -1:
+        return None
+    start += len(open_tag)
+    end = text.find(close_tag, start)
+    if end == -1:
+        return None
+    return text[start:end]
+
+def find_closing(text, start, open_tag, close_tag):
+    """Return the index just past the close_tag pairing with the open_tag at start, or -1."""
+    depth = 0
+    pos = start
+    while True:
+        next_open = text.find(open_tag, pos)
+        next_close = text.find(close_tag, pos)
+        if next_close == -1:
+            return -1
+        if next_open != -1 and next_open < next_close:
+            depth += 1
+            pos = next_open + len(open_tag)
+        else:
+            depth -= 1
+            pos = next_close + len(close_tag)
+            if depth == 0:
+                return pos
+
+def parse_title(header):
+    """Return the plain-text CollapsibleTitle of a header button, or None if it has markup."""
+    title = extract_between(header, '<CollapsibleTitle>', '</CollapsibleTitle>')
+    if title is None:
+        return None
+    
+    # Drop a leading <FiIcon /> if present
+    title = title.lstrip()
+    if title.startswith('<Fi'):
+        icon_end = title.find('/>')
+        if icon_end == -1:
+            return None
+        title = title[icon_end + 2:]
+    if not title or '<' in title:
+        return None
     
-    # Extract title
-    title_match = re.search(r'<CollapsibleTitle>\s*(?:<Fi\w+\s*/>\s*)?([^<]+)</CollapsibleTitle>', full_match)
-    if not title_match:
-        return full_match  # Can't parse, skip
+    return title.strip()
+
+def parse_section(section):
+    """Return (title, content) for a convertible CollapsibleSection block, or None.
+
+    Expected layout (whitespace-insensitive):
+        <CollapsibleSection>
+            <CollapsibleHeaderButton ...>...</CollapsibleHeaderButton>
+            {!collapsedSections.key && (
+                <CollapsibleContent>...</CollapsibleContent>
+            )}
+        </CollapsibleSection>
+    """
+    body = section[len(SECTION_OPEN):-len(SECTION_CLOSE)].lstrip()
+    if not body.startswith(HEADER_OPEN):
+        return None
+    header_end = body.find(HEADER_CLOSE)
+    if header_end == -1:
+        return None
+    title = parse_title(body[:header_end])
+    if title is None:
+        return None  # Can't parse, skip
+    rest = body[header_end + len(HEADER_CLOSE):].lstrip()
     
-    title = title_match.group(1).strip()
+    # {...collapsedSections... && (
+    if not rest.startswith('{'):
+        return None
+    condition_end = rest.find('&&')
+    if condition_end == -1:
+        return None
+    condition = rest[1:condition_end]
+    if 'collapsedSections' not in condition or '}' in condition:
+        return None
+    rest = rest[condition_end + 2:].lstrip()
+    if not rest.startswith('('):
+        return None
+    rest = rest[1:].lstrip()
+    if not rest.startswith(CONTENT_OPEN):
+        return None
     
+    # The content ends at its own paired closer, followed only by ')}'
+    content_end = find_closing(rest, 0, CONTENT_OPEN, CONTENT_CLOSE)
+    if content_end == -1 or ''.join(rest[content_end:].split()) != ')}':
+        return None
+    return title, rest[len(CONTENT_OPEN):content_end - len(CONTENT_CLOSE)]
+
+def iter_sections(content):
+    """Yield (start, end, title, content) for convertible CollapsibleSection blocks in one forward scan."""
+    pos = 0
+    while True:
+        start = content.find(SECTION_OPEN, pos)
+        if start == -1:
+            return
+        end = find_closing(content, start, SECTION_OPEN, SECTION_CLOSE)
+        if end == -1:
+            # Unmatched opener (e.g. in a comment); keep scanning after it
+            pos = start + len(SECTION_OPEN)
+            continue
+        parsed = parse_section(content[start:end])
+        if parsed:
+            yield (start, end, *parsed)
+            pos = end
+        else:
+            # Not our shape; a nested section inside it may still be
+            pos = start + len(SECTION_OPEN)
+
+def replace_sections(content, spans):
+    """Rebuild content with each parsed section span converted, in one join.
+
+    Legacy sections nested in a converted body are converted too. Returns the new
+    content and the titles of every converted section, nested ones included.
+    """
+    parts = []
+    titles = []
+    pos = 0
+    for start, end, title, body in spans:
+        body, nested_titles = replace_sections(body, list(iter_sections(body)))
+        parts.append(content[pos:start])
+        parts.append(convert_section(title, body))
+        titles.append(title)
+        titles.extend(nested_titles)
+        pos = end
+    parts.append(content[pos:])
+    return ''.join(parts), titles
+
+@functools.lru_cache(maxsize=None)
+def section_style(title):
+    """Return the (icon, theme) for a section title, memoised per title."""
+    rank = min(map(KEYWORD_RANK.__getitem__, KEYWORD_PATTERN.findall(title.lower())), default=None)
+    return DEFAULT_SECTION_STYLE if rank is None else SECTION_STYLES[rank][1:]
+
+def convert_section(title, content):
+    """Build the CollapsibleHeader replacing a parsed CollapsibleHeaderButton section."""
     # Determine icon and theme based on title keywords
-    icon = '<FiSettings />'
-    theme = ''
-    
-    if any(word in title.lower() for word in ['overview', 'what is', 'how', 'education', 'learn', 'understand']):
-        icon = '<FiBook />'
-        theme = 'theme="yellow"'
-    elif any(word in title.lower() for word in ['configuration', 'credentials', 'settings', 'parameters', 'advanced', 'pkce']):
-        icon = '<FiSettings />'
-        theme = 'theme="orange"'
-    elif any(word in title.lower() for word in ['request', 'authorization', 'generate', 'create']):
-        icon = '<FiSend />'
-        theme = 'theme="blue"'
-    elif any(word in title.lower() for word in ['response', 'received', 'token', 'code', 'result']):
-        icon = '<FiPackage />'
-        theme = ''  # default
-    elif any(word in title.lower() for word in ['complete', 'success', 'done', 'next steps']):
-        icon = '<FiCheckCircle />'
-        theme = 'theme="green"'
-    elif 'deep dive' in title.lower() or 'details' in title.lower():
-        icon = '<FiBook />'
-        theme = 'theme="green"'
-    
-    # Extract content between CollapsibleContent tags
-    content_match = re.search(r'<CollapsibleContent>(.*?)</CollapsibleContent>', full_match, re.DOTALL)
-    if not content_match:
-        return full_match
-    
-    content = content_match.group(1)
+    icon, theme = section_style(title)
     
     # Build new CollapsibleHeader
     theme_attr = f'\n\t\t\t\t\t{theme}' if theme else ''
@@ -97,40 +263,48 @@ def convert_section(match):
 
 def migrate_file(filepath):
     """Migrate a single file."""
+    content = filepath.read_bytes().decode("utf-8")
     print(f"\n📝 Migrating: {filepath.name}")
     
-    content = filepath.read_text()
     original_content = content
     
-    # Step 1: Add imports
-    content = add_imports(content)
-    
-    # Step 2: Convert CollapsibleSection patterns
-    # Pattern: <CollapsibleSection>...<CollapsibleHeaderButton>...<CollapsibleContent>...</CollapsibleContent>...</CollapsibleSection>
-    pattern = r'<CollapsibleSection>\s*<CollapsibleHeaderButton[^>]*>.*?</CollapsibleHeaderButton>\s*\{[^}]*collapsedSections[^}]*\}\s*&&\s*\(\s*<CollapsibleContent>.*?</CollapsibleContent>\s*\)\s*\}\s*</CollapsibleSection>'
-    
-    sections_found = len(re.findall(pattern, content, re.DOTALL))
+    # Step 1: Convert CollapsibleSection patterns
+    # Scan once; the same spans drive both the rewrite and the count
+    content, titles = replace_sections(content, list(iter_sections(content)))
+    sections_found = len(titles)
     print(f"  Found {sections_found} sections to convert")
     
     if sections_found == 0:
         print("  ⚠️  No sections found - file may have different pattern")
         return False
     
-    # Convert each section
-    content = re.sub(pattern, convert_section, content, flags=re.DOTALL)
+    # Step 2: Add imports, only once a converted section actually uses them
+    if content != original_content:
+        # '<FiBook />' -> 'FiBook' for every icon the converted sections render
+        icons = {section_style(title)[0].strip('<> /') for title in titles}
+        content = add_imports(content, icons)
     
     # Step 3: Remove CollapsibleSection, CollapsibleHeaderButton, etc. styled components
     # (Keep them for now as they might be used elsewhere)
     
     # Step 4: Write back
     if content != original_content:
-        filepath.write_text(content)
+        filepath.write_bytes(content.encode("utf-8"))
         print(f"  ✅ Migrated {sections_found} sections")
         return True
     else:
         print("  ⚠️  No changes made")
         return False
 
+def migrate_path(file_path):
+    """Pool worker: migrate the file at file_path (a str) and report whether it changed."""
+    # Let the read itself report a missing file instead of stat-ing first
+    try:
+        return migrate_file(Path(file_path))
+    except FileNotFoundError:
+        print(f"❌ File not found: {file_path}")
+        return False
+
 def main():
     """Main migration script."""
     files = [
@@ -143,15 +317,9 @@ def main():
     print("🚀 Starting Phase 3 Migration")
     print("=" * 50)
     
-    migrated = 0
-    for file_path in files:
-        path = Path(file_path)
-        if not path.exists():
-            print(f"❌ File not found: {file_path}")
-            continue
-        
-        if migrate_file(path):
-            migrated += 1
+    # Files are independent and the scanning is CPU-bound, so use processes
+    with multiprocessing.Pool(processes=min(len(files), os.cpu_count() or 1)) as pool:
+        migrated = sum(pool.map(migrate_path, files))
     
     print("\n" + "=" * 50)
     print(f"✅ Migration complete: {migrated}/{len(files)} files migrated")
@@ -4,139 +4,148 @@ Badge Migration Script for DragDropSidebar.V2.tsx
 Replaces FiCheckCircle badges with MenuVersionBadge components
 """
 
+import hashlib
+import io
+import json
+import os
 import re
+import sys
+from pathlib import Path
 
 FILE_PATH = "src/components/DragDropSidebar.V2.tsx"
+# Records the state of FILE_PATH after the last successful run
+CACHE_PATH = Path(".migrate-badges.cache")
+
+# Editing this script (e.g. adding a title to TITLE_TO_BADGE) invalidates the cache
+SCRIPT_SHA256 = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+# Skip everything if neither the file nor this script changed since the last run
+st = os.stat(FILE_PATH)
+# A missing, truncated or corrupt sidecar is just a cache miss
+try:
+    cache = json.loads(CACHE_PATH.read_text())
+except (OSError, ValueError):
+    cache = {}
+if not isinstance(cache, dict):
+    cache = {}
+if cache.get('path') != FILE_PATH or cache.get('script_sha256') != SCRIPT_SHA256:
+    cache = {}
+if cache.get('mtime_ns') == st.st_mtime_ns and cache.get('size') == st.st_size:
+    print("✅ No changes since last badge migration, nothing to do")
+    sys.exit(0)
 
 # Read the file
 with open(FILE_PATH, 'r') as f:
     content = f.read()
 
-# Badge replacements mapping
-replacements = [
+# Touched but identical content (e.g. checkout or save without edits)
+if cache.get('sha256') == hashlib.sha256(content.encode('utf-8')).hexdigest():
+    CACHE_PATH.write_text(json.dumps({**cache, 'mtime_ns': st.st_mtime_ns, 'size': st.st_size}))
+    print("✅ No changes since last badge migration, nothing to do")
+    sys.exit(0)
+
+# Every badge pattern needs FiCheckCircle, so without it there is nothing to migrate
+if 'FiCheckCircle' not in content:
+    print("✅ Nothing to migrate: no FiCheckCircle instances found")
+    sys.exit(0)
+
+# Badge replacements, keyed by MigrationBadge title
+V8_BADGE = '<MenuVersionBadge version="9.11.76" type="v8" />'
+V7_BADGE = '<MenuVersionBadge version="7.2.0" type="v7" />'
+PRODUCTION_BADGE = '<MenuVersionBadge version="9.11.76" type="production" />'
+
+TITLE_TO_BADGE = {
     # V8 Flows (Blue - version 9.11.76)
-    (r'badge: \(\s*<MigrationBadge title="PingOne Token Exchange \(RFC 8693\) - New Feature Implementation">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)', 
-     'badge: <MenuVersionBadge version="9.11.76" type="v8" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V8: Demonstrating Proof of Possession \(RFC 9449\) with mock server">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="v8" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V8: Simplified UI with educational content in modals">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="v8" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Test ALL OAuth/OIDC flow types: Auth Code, Implicit, Hybrid, Device Code, Client Credentials">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="v8" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Test RFC 9126 Pushed Authorization Request \(PAR\) flow">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="v8" />'),
-    
+    "PingOne Token Exchange (RFC 8693) - New Feature Implementation": V8_BADGE,
+    "V8: Demonstrating Proof of Possession (RFC 9449) with mock server": V8_BADGE,
+    "V8: Simplified UI with educational content in modals": V8_BADGE,
+    "Test ALL OAuth/OIDC flow types: Auth Code, Implicit, Hybrid, Device Code, Client Credentials": V8_BADGE,
+    "Test RFC 9126 Pushed Authorization Request (PAR) flow": V8_BADGE,
+
     # V7 Flows (Purple - version 7.2.0)
-    (r'badge: \(\s*<MigrationBadge title="V7\.2: Adds optional redirectless \(pi\.flow\) with Custom Login">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: Unified OAuth/OIDC implementation with variant selector">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: Unified OAuth/OIDC device authorization">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: Enhanced client credentials">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: CIBA \(RFC 9436\) Client Initiated Backchannel Authentication - Real PingOne API">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: Unified OAuth/OIDC hybrid flow implementation">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: Enhanced Pushed Authorization Request with Authorization Details">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: Enhanced PingOne Multi-Factor Authentication">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: PingOne Workflow Library Steps 11-20 - Authorization Code with MFA">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: PingOne Redirectless Flow \(pi\.flow\)">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="V7: Enhanced worker token flow">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="7.2.0" type="v7" />'),
-    
+    "V7.2: Adds optional redirectless (pi.flow) with Custom Login": V7_BADGE,
+    "V7: Unified OAuth/OIDC implementation with variant selector": V7_BADGE,
+    "V7: Unified OAuth/OIDC device authorization": V7_BADGE,
+    "V7: Enhanced client credentials": V7_BADGE,
+    "V7: CIBA (RFC 9436) Client Initiated Backchannel Authentication - Real PingOne API": V7_BADGE,
+    "V7: Unified OAuth/OIDC hybrid flow implementation": V7_BADGE,
+    "V7: Enhanced Pushed Authorization Request with Authorization Details": V7_BADGE,
+    "V7: Enhanced PingOne Multi-Factor Authentication": V7_BADGE,
+    "V7: PingOne Workflow Library Steps 11-20 - Authorization Code with MFA": V7_BADGE,
+    "V7: PingOne Redirectless Flow (pi.flow)": V7_BADGE,
+    "V7: Enhanced worker token flow": V7_BADGE,
+
     # Production Features (Green - version 9.11.76)
-    (r'badge: \(\s*<MigrationBadge title="Real-world MFA experience - Kroger Grocery Store mockup">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="PingOne Authentication Flow">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Pushed Authorization Request Flow">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Validate and test PingOne worker tokens">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Token Analysis and Management">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Token Introspection - Inspect and validate OAuth tokens">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Token Revocation - Revoke access and refresh tokens">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="UserInfo Flow - Retrieve user profile information">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="PingOne Logout - RP-initiated logout with PingOne SSO">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="PingOne User Profile & Information">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="PingOne Total Identities metrics explorer">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="PingOne Password Reset Operations">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Query and analyze PingOne audit events">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Real-time webhook event monitoring">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="View organization licensing and usage information">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="OIDC Discovery and Configuration">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Advanced Configuration Options">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="JWKS Troubleshooting Guide">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Production-ready OAuth code in multiple languages">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-    
-    (r'badge: \(\s*<MigrationBadge title="Production-ready DaVinci SDK integration with real PingOne APIs">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)',
-     'badge: <MenuVersionBadge version="9.11.76" type="production" />'),
-]
-
-# Apply all replacements
-for pattern, replacement in replacements:
-    content = re.sub(pattern, replacement, content, flags=re.MULTILINE | re.DOTALL)
-
-# Remove FiCheckCircle from imports if it exists
-content = re.sub(r',?\s*FiCheckCircle,?', '', content)
+    "Real-world MFA experience - Kroger Grocery Store mockup": PRODUCTION_BADGE,
+    "PingOne Authentication Flow": PRODUCTION_BADGE,
+    "Pushed Authorization Request Flow": PRODUCTION_BADGE,
+    "Validate and test PingOne worker tokens": PRODUCTION_BADGE,
+    "Token Analysis and Management": PRODUCTION_BADGE,
+    "Token Introspection - Inspect and validate OAuth tokens": PRODUCTION_BADGE,
+    "Token Revocation - Revoke access and refresh tokens": PRODUCTION_BADGE,
+    "UserInfo Flow - Retrieve user profile information": PRODUCTION_BADGE,
+    "PingOne Logout - RP-initiated logout with PingOne SSO": PRODUCTION_BADGE,
+    "PingOne User Profile & Information": PRODUCTION_BADGE,
+    "PingOne Total Identities metrics explorer": PRODUCTION_BADGE,
+    "PingOne Password Reset Operations": PRODUCTION_BADGE,
+    "Query and analyze PingOne audit events": PRODUCTION_BADGE,
+    "Real-time webhook event monitoring": PRODUCTION_BADGE,
+    "View organization licensing and usage information": PRODUCTION_BADGE,
+    "OIDC Discovery and Configuration": PRODUCTION_BADGE,
+    "Advanced Configuration Options": PRODUCTION_BADGE,
+    "JWKS Troubleshooting Guide": PRODUCTION_BADGE,
+    "Production-ready OAuth code in multiple languages": PRODUCTION_BADGE,
+    "Production-ready DaVinci SDK integration with real PingOne APIs": PRODUCTION_BADGE,
+}
+
+# Every badge shares the same markup, so one pattern captures the title and the
+# replacement becomes a dict lookup instead of a full-file scan per badge
+BADGE_RE = re.compile(
+    r'badge: \(\s*<MigrationBadge title="(?P<title>[^"]+)">\s*<FiCheckCircle />\s*</MigrationBadge>\s*\)'
+)
+FI_ICONS_IMPORT = "} from 'react-icons/fi'"
+
+
+def replace_badge(match):
+    # Normalize whitespace so titles wrapped by Prettier still hit the table
+    title = ' '.join(match.group('title').split())
+    badge = TITLE_TO_BADGE.get(title)
+    return f'badge: {badge}' if badge else match.group(0)
+
+
+# Apply all replacements in a single pass, writing the result into one buffer
+buf = io.StringIO()
+pos = 0
+for match in BADGE_RE.finditer(content):
+    buf.write(content[pos:match.start()])
+    buf.write(replace_badge(match))
+    pos = match.end()
+buf.write(content[pos:])
+content = buf.getvalue()
+
+# Remove FiCheckCircle from the react-icons import once no badge uses it anymore
+import_end = content.find(FI_ICONS_IMPORT)
+import_start = content.rfind('import {', 0, import_end)
+if import_end != -1 and import_start != -1 and '<FiCheckCircle' not in content:
+    statement = content[import_start:import_end]
+    stripped = (statement.replace('\n\tFiCheckCircle,', '')
+                         .replace(', FiCheckCircle', '')
+                         .replace('FiCheckCircle, ', ''))
+    content = content[:import_start] + stripped + content[import_end:]
 
 # Write the updated content
 with open(FILE_PATH, 'w') as f:
     f.write(content)
 
+st = os.stat(FILE_PATH)
+CACHE_PATH.write_text(json.dumps({
+    'path': FILE_PATH,
+    'script_sha256': SCRIPT_SHA256,
+    'mtime_ns': st.st_mtime_ns,
+    'size': st.st_size,
+    'sha256': hashlib.sha256(content.encode('utf-8')).hexdigest(),
+}))
+
 # Count remaining FiCheckCircle instances
 remaining = content.count('FiCheckCircle')
 print(f"✅ Badge migration complete!")